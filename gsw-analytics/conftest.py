@@ -0,0 +1 @@
+# Put gsw-analytics on sys.path so tests can import the `scripts` package like the scripts do
@@ -1,14 +1,10 @@
-import pandas as pd
 from scripts.common_center_utils import (
-    pipeline, summarize_games, win_rate, team_eff, fmt_pct
+    pipeline_cached, summarize_games, win_rate, team_eff, fmt_pct
 )
 
-# ---- Load ----
-games = pd.read_csv("data/gsw_games.csv", parse_dates=["GAME_DATE"])
-box   = pd.read_csv("data/gsw_boxscores.csv", dtype={"GAME_ID": str})
-
-# ---- Run shared pipeline (TEAM_ID from env or defaults to GSW) ----
-games, box_gsw, starters_c, allowed_trad = pipeline(games, box)
+# ---- Load + run shared pipeline (TEAM_ID from env or defaults to GSW) ----
+# Memoized under data/.cache; re-runs only when the CSVs (or the pipeline) change
+games, box_gsw, starters_c, allowed_trad = pipeline_cached("data/gsw_games.csv", "data/gsw_boxscores.csv")
 
 # ---- Splits ----
 with_center = games[games["HAS_CENTER"]]
@@ -39,5 +35,8 @@ print(f"  Net Rating        : {eff_without['net_rating'] if eff_without['net_rat
 
 # ---- Save breakdown used by notebooks/dashboards ----
 out_cols = ["GAME_DATE", "MATCHUP", "WL", "PTS", "PTS_OPP", "PLUS_MINUS", "HAS_CENTER"]
-games[out_cols].to_csv("data/center_impact_summary.csv", index=False)
-print("\nSaved detailed breakdown to data/center_impact_summary.csv")
\ No newline at end of file
+breakdown = games[out_cols].reset_index(drop=True)
+breakdown.to_csv("data/center_impact_summary.csv", index=False)
+# Arrow IPC copy keeps dtypes and is memory-mapped on read: pd.read_feather(path, dtype_backend="pyarrow")
+breakdown.to_feather("data/center_impact_summary.feather")
+print("\nSaved detailed breakdown to data/center_impact_summary.csv and data/center_impact_summary.feather")
\ No newline at end of file
@@ -1,33 +1,75 @@
 import os
+import numpy as np
 import pandas as pd
 from pathlib import Path
+from scripts.common_center_utils import (
+    read_csv, norm_str, map_categories, normalize_team_id, gather_by_category
+)
 
 DATA_DIR = Path("data")
 OUT_DIR = DATA_DIR / "cleaned"
 PER_TEAM_DIR = DATA_DIR / "teams"  # optional per-team outputs
+# "parquet" (default) writes columnar files + a hive-partitioned per-team dataset;
+# "csv" keeps the original one-CSV-per-team layout
+OUT_FORMAT = os.getenv("OUT_FORMAT", "parquet").lower()
 OUT_DIR.mkdir(parents=True, exist_ok=True)
 PER_TEAM_DIR.mkdir(parents=True, exist_ok=True)
 
 def normalize_team_cols(df: pd.DataFrame) -> pd.DataFrame:
     # Make team identifiers reliable for sorting/grouping
     if "TEAM_ABBREVIATION" in df.columns:
-        df["TEAM_ABBREVIATION"] = (
-            df["TEAM_ABBREVIATION"].astype(str).str.strip().str.upper()
-        )
+        # ~30 distinct teams: strip/upper the categories, not every row
+        df["TEAM_ABBREVIATION"] = map_categories(df["TEAM_ABBREVIATION"], norm_str)
     if "TEAM_ID" in df.columns:
-        df["TEAM_ID"] = pd.to_numeric(df["TEAM_ID"], errors="coerce").astype("Int64")
+        df = normalize_team_id(df)
     return df
 
 def load_csv(path: Path, parse_dates=None) -> pd.DataFrame:
     parse_dates = parse_dates or []
-    df = pd.read_csv(path, parse_dates=parse_dates)
+    df = read_csv(path, parse_dates=parse_dates)
     return df
 
+def stable_sort(df: pd.DataFrame, sort_cols) -> pd.DataFrame:
+    """Stable multi-column sort via np.lexsort on integer codes (NaNs last, like sort_values)."""
+    keys = []
+    for col in reversed(sort_cols):  # lexsort treats the last key as the primary one
+        codes, uniques = pd.factorize(df[col], sort=True)
+        keys.append(np.where(codes < 0, len(uniques), codes))
+    return df.iloc[np.lexsort(keys)]
+
 def save_sorted(df: pd.DataFrame, path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
-    df.to_csv(path, index=False)
+    if OUT_FORMAT == "parquet":
+        path = path.with_suffix(".parquet")
+        df.to_parquet(path, index=False, engine="pyarrow", compression="zstd")
+    else:
+        df.to_csv(path, index=False)
     print(f"Saved: {path}")
 
+def save_per_team(df: pd.DataFrame, name: str):
+    """Write one output per TEAM_ABBREVIATION (e.g. name="games" -> GSW_games.csv)."""
+    if OUT_FORMAT == "parquet":
+        # One partitioned write from the columnar buffers: teams/<name>/TEAM_ABBREVIATION=GSW/...
+        out_dir = PER_TEAM_DIR / name
+        df.to_parquet(
+            out_dir,
+            partition_cols=["TEAM_ABBREVIATION"],
+            engine="pyarrow",
+            compression="zstd",
+            index=False,
+            existing_data_behavior="delete_matching",
+        )
+        print(f"Saved: {out_dir}")
+        return
+
+    # CSV: split rows by team code with one stable argsort instead of groupby dispatch
+    team = df["TEAM_ABBREVIATION"].astype("category")
+    codes = team.cat.codes.to_numpy()
+    order = np.argsort(codes, kind="stable")
+    bounds = np.searchsorted(codes[order], np.arange(len(team.cat.categories) + 1))
+    for k, abbr in enumerate(team.cat.categories):
+        save_sorted(df.iloc[order[bounds[k]:bounds[k + 1]]], PER_TEAM_DIR / f"{abbr}_{name}.csv")
+
 def clean_games():
     src = DATA_DIR / "gsw_games.csv"
     if not src.exists():
@@ -51,16 +93,15 @@ def clean_games():
         sort_cols.append("MATCHUP")
 
     if sort_cols:
-        games_sorted = games.sort_values(sort_cols, kind="mergesort")  # stable sort keeps natural blocks
+        games_sorted = stable_sort(games, sort_cols)  # stable sort keeps natural blocks
     else:
-        games_sorted = games.copy()
+        games_sorted = games
 
     save_sorted(games_sorted, OUT_DIR / "games_sorted.csv")
 
-    # Optional: write per-team games CSVs (only if it’s multi-team; safe if one team)
+    # Optional: write per-team games outputs (only if it’s multi-team; safe if one team)
     if "TEAM_ABBREVIATION" in games_sorted.columns:
-        for abbr, sub in games_sorted.groupby("TEAM_ABBREVIATION"):
-            save_sorted(sub, PER_TEAM_DIR / f"{abbr}_games.csv")
+        save_per_team(games_sorted, "games")
 
 def clean_boxscores():
     src = DATA_DIR / "gsw_boxscores.csv"
@@ -74,7 +115,7 @@ def clean_boxscores():
     # Normalize names a touch for consistent grouping (no changes to saved columns)
     # (We won't overwrite names; just build a temporary sort key)
     if "PLAYER_NAME" in box.columns:
-        box["_PLAYER_NAME_KEY"] = box["PLAYER_NAME"].astype(str).str.strip().str.upper()
+        box["_PLAYER_NAME_KEY"] = norm_str(box["PLAYER_NAME"])
     else:
         box["_PLAYER_NAME_KEY"] = ""
 
@@ -82,7 +123,10 @@ def clean_boxscores():
     # If GAME_DATE isn't in the box file, this still works fine
     if "GAME_ID" in box.columns:
         box["GAME_ID"] = box["GAME_ID"].astype(str)
-        box["_GID_NORM"] = box["GAME_ID"].str.lstrip("0")
+        # Only ~100 distinct games: lstrip once per id and gather via the codes
+        box["_GID_NORM"] = pd.Series(
+            gather_by_category(box["GAME_ID"], lambda c: c.str.lstrip("0"), np.nan, dtype=object), index=box.index
+        )
     else:
         box["_GID_NORM"] = ""
 
@@ -97,14 +141,13 @@ def clean_boxscores():
     # keep same game blocks together
     sort_cols.append("_GID_NORM")
 
-    box_sorted = box.sort_values(sort_cols, kind="mergesort").drop(columns=["_PLAYER_NAME_KEY", "_GID_NORM"], errors="ignore")
+    box_sorted = stable_sort(box, sort_cols).drop(columns=["_PLAYER_NAME_KEY", "_GID_NORM"], errors="ignore")
 
     save_sorted(box_sorted, OUT_DIR / "boxscores_sorted.csv")
 
-    # Optional: write per-team boxscores CSVs
+    # Optional: write per-team boxscores outputs
     if "TEAM_ABBREVIATION" in box_sorted.columns:
-        for abbr, sub in box_sorted.groupby("TEAM_ABBREVIATION"):
-            save_sorted(sub, PER_TEAM_DIR / f"{abbr}_boxscores.csv")
+        save_per_team(box_sorted, "boxscores")
 
 if __name__ == "__main__":
     clean_games()
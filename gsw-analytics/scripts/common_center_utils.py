@@ -1,18 +1,71 @@
 # scripts/common_center_utils.py
 import os
-from typing import Set, Dict, Any, Tuple, Optional
+import math
+import json
+import hashlib
+import shutil
+from pathlib import Path
+from typing import Set, Dict, Any, List, Tuple, Optional, Callable
+import numpy as np
 import pandas as pd
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; mmss_to_min falls back to pandas string ops
+    njit = None
+
+# Copy-on-Write: filtered frames can take new columns without a defensive .copy()
+# (always on from pandas 3.0, where setting the option is deprecated)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.options.mode.copy_on_write = True
+
 # ------------------------
 # Constants (can be overridden via env)
 # ------------------------
 GSW_TEAM_ID_DEFAULT = 1610612744  # Golden State Warriors
 EXCLUDE_SMALL_BALL_DEFAULT: Set[str] = {"DRAYMOND GREEN"}
 INCLUDE_TRADITIONAL_DEFAULT: Set[str] = {"KEVON LOONEY", "TRAYCE JACKSON-DAVIS"}  # add more if needed
+PIPELINE_CACHE_DIR_DEFAULT = Path("data") / ".cache"
 
 # ------------------------
 # Helpers
 # ------------------------
+def _is_text_dtype(t) -> bool:
+    """True for every dtype pd.read_csv reads as text: str, "str", "string", object, "string[pyarrow]"..."""
+    return t is str or pd.api.types.is_string_dtype(pd.api.types.pandas_dtype(t))
+
+def read_csv(path, dtype: Optional[Dict[str, Any]] = None, parse_dates: Optional[List[str]] = None) -> pd.DataFrame:
+    """Read a CSV with the multi-threaded pyarrow parser into Arrow-backed columns.
+
+    `dtype` is applied at parse time, so text IDs such as GAME_ID keep their leading zeros;
+    `parse_dates` columns are read as text and then parsed by pd.to_datetime, which takes
+    the same formats as pd.read_csv. Falls back to pandas' default engine when pyarrow is
+    not installed.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+    except ImportError:
+        return pd.read_csv(path, dtype=dtype, parse_dates=parse_dates)
+
+    dtype = dtype or {}
+    text = {col for col, t in dtype.items() if _is_text_dtype(t)}
+    column_types = {col: pa.string() for col in text}
+    column_types.update({col: pa.string() for col in (parse_dates or [])})
+    convert = pacsv.ConvertOptions(column_types=column_types, strings_can_be_null=True)
+    df = pacsv.read_csv(path, convert_options=convert).to_pandas(types_mapper=pd.ArrowDtype)
+    other = {col: t for col, t in dtype.items() if col not in text}
+    if other:
+        df = df.astype(other)
+    # Plain datetime64 columns like pd.read_csv(parse_dates=...), which also leaves a column
+    # that doesn't parse as text
+    for col in parse_dates or []:
+        try:
+            df[col] = pd.to_datetime(df[col])
+        except (ValueError, TypeError):
+            pass
+    return df
+
 def _safe_numeric_series(series_like, length: int, index) -> pd.Series:
     """Return a Series (never None) suitable for pd.to_numeric."""
     if isinstance(series_like, pd.Series):
@@ -20,9 +73,128 @@ def _safe_numeric_series(series_like, length: int, index) -> pd.Series:
     # fallback: Series of NA (float dtype to allow to_numeric)
     return pd.Series([pd.NA] * length, index=index, dtype="float64")
 
+def norm_str(values):
+    """Trim whitespace and upper-case strings with pyarrow compute kernels.
+
+    Takes a Series or Index and returns the same kind. Falls back to the pandas
+    .str chain when pyarrow is not installed.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError:
+        return values.astype(str).str.strip().str.upper()
+    arr = pa.array(values.astype(str), type=pa.string())
+    out = pd.arrays.ArrowExtensionArray(pc.utf8_upper(pc.utf8_trim_whitespace(arr)))
+    if isinstance(values, pd.Index):
+        return pd.Index(out, name=values.name)
+    return pd.Series(out, index=values.index, name=values.name)
+
+def _recode(cat: pd.Series, names: pd.Index, sort: bool = False) -> pd.Series:
+    """Relabel the categories of `cat` with `names`, merging categories that get the same name."""
+    uniq = names.unique()
+    if sort:
+        uniq = uniq.sort_values()
+    remap = uniq.get_indexer(names)
+    codes = cat.cat.codes.to_numpy()
+    new_codes = np.full(len(codes), -1, dtype=remap.dtype)
+    valid = codes >= 0
+    new_codes[valid] = remap[codes[valid]]
+    return pd.Series(pd.Categorical.from_codes(new_codes, categories=uniq), index=cat.index, name=cat.name)
+
+def _as_str_category(series: pd.Series) -> pd.Series:
+    """Cast to category with string categories (str() runs once per distinct value).
+
+    Values with the same text (e.g. 22400001 and "22400001") end up in one category.
+    """
+    cat = series.astype("category")
+    return _recode(cat, cat.cat.categories.astype(str))
+
+def gather_by_category(series: pd.Series, func: Callable[[pd.Index], Any], fill: Any, dtype=None) -> np.ndarray:
+    """Evaluate `func` once per distinct value of `series` and gather the result to every row.
+
+    `func` gets the (string) categories and returns one value per category; rows with a
+    missing value (category code -1) get `fill` from a slot appended after the lookup table.
+    """
+    cat = _as_str_category(series)
+    lut = np.append(np.asarray(func(cat.cat.categories), dtype=dtype), [fill])
+    return lut[cat.cat.codes.to_numpy()]
+
+def map_categories(series: pd.Series, func: Callable[[pd.Index], pd.Index]) -> pd.Series:
+    """Apply a string transform to the categories only, then gather back via the codes.
+
+    Safe when the transform collapses distinct values (e.g. " C" and "C"). The result's
+    categories are sorted, so sorting on it orders rows like the plain strings would.
+    """
+    cat = _as_str_category(series)
+    return _recode(cat, pd.Index(func(cat.cat.categories)), sort=True)
+
+def _parse_mmss(buf, out):
+    """Parse rows of ASCII bytes ("MM:SS", NUL-padded) into minutes.
+
+    Each side of the first ':' should be plain digits; a side that isn't counts as 0.
+    """
+    colon, zero = 58, 48
+    for i in range(buf.shape[0]):
+        m, cur, ndigits, bad, part = 0.0, 0.0, 0, False, 0
+        for j in range(buf.shape[1]):
+            c = buf[i, j]
+            if c == 0:
+                break
+            if c == colon and part == 0:
+                m = cur if ndigits > 0 and not bad else 0.0
+                cur, ndigits, bad, part = 0.0, 0, False, 1
+            elif zero <= c <= zero + 9:
+                cur = cur * 10.0 + (c - zero)
+                ndigits += 1
+            else:
+                bad = True
+        last = cur if ndigits > 0 and not bad else 0.0
+        if part == 0:
+            m, last = last, 0.0
+        out[i] = m + last / 60.0
+
+if njit is not None:
+    _parse_mmss = njit(cache=True)(_parse_mmss)
+
+def _mmss_to_min_kernel(minutes: pd.Series) -> np.ndarray:
+    # Fixed-width bytes viewed as a (rows, width) uint8 matrix for the compiled loop; non-ASCII
+    # characters become '?', which the kernel rejects like any other non-digit
+    raw = minutes.fillna("").astype(str).str.encode("ascii", errors="replace").to_numpy().astype("S")
+    buf = raw.view(np.uint8).reshape(len(raw), raw.dtype.itemsize)
+    out = np.empty(len(raw), dtype=np.float64)
+    _parse_mmss(buf, out)
+    return out
+
+def _mmss_to_min_pandas(minutes: pd.Series) -> np.ndarray:
+    # "MM:SS" has at most a few thousand distinct values: split/parse each once, gather by the codes
+    def parse(values: pd.Index) -> pd.Series:
+        parts = pd.Series(values).str.split(":", n=1, expand=True).reindex(columns=[0, 1])
+        m = pd.to_numeric(parts[0], errors="coerce").fillna(0)
+        s = pd.to_numeric(parts[1], errors="coerce").fillna(0)
+        return m + s / 60
+
+    return gather_by_category(minutes, parse, 0.0, dtype="float64")
+
+def mmss_to_min(minutes: pd.Series) -> np.ndarray:
+    """Convert "MM:SS" strings to float minutes; a side that isn't a number counts as 0.
+
+    Uses the numba kernel when numba is installed, pandas string ops otherwise. Both give the
+    same minutes for "MM:SS" digits, missing and non-numeric values; the pandas path also
+    reads whatever pd.to_numeric does (padding, signs, decimals), which the kernel counts as 0.
+    """
+    if njit is not None:
+        return _mmss_to_min_kernel(minutes)
+    return _mmss_to_min_pandas(minutes)
+
 def normalize_team_id(box: pd.DataFrame) -> pd.DataFrame:
     s = _safe_numeric_series(box.get("TEAM_ID"), len(box), box.index)
-    box["TEAM_ID"] = pd.to_numeric(s, errors="coerce").astype("Int64")
+    if pd.api.types.is_numeric_dtype(s):
+        box["TEAM_ID"] = s.astype("Int64")
+        return box
+    # Text ids: parse each of the ~30 distinct values once, then gather via the codes
+    ids = gather_by_category(s, lambda c: pd.to_numeric(c, errors="coerce").astype("float64"), np.nan, dtype="float64")
+    box["TEAM_ID"] = pd.Series(ids, index=box.index).astype("Int64")
     return box
 
 def add_pts_opp_if_missing(games: pd.DataFrame) -> pd.DataFrame:
@@ -32,42 +204,64 @@ def add_pts_opp_if_missing(games: pd.DataFrame) -> pd.DataFrame:
         games["PTS_OPP"] = pd.NA
     return games
 
+def _gid_to_int(game_id: pd.Series) -> pd.Series:
+    """GAME_ID as nullable Int64 (leading zeros dropped), parsed once per distinct id.
+
+    Missing or non-numeric ids become <NA> rather than a real game's id.
+    """
+    ids = gather_by_category(
+        game_id, lambda c: pd.to_numeric(c, errors="coerce").astype("float64"), np.nan, dtype="float64"
+    )
+    return pd.Series(ids, index=game_id.index).astype("Int64")
+
+def _gid_values(gid_norm: pd.Series) -> np.ndarray:
+    # Plain int64 for np.isin; <NA> becomes -1, which no NBA game id uses
+    return gid_norm.to_numpy(dtype="int64", na_value=-1)
+
 def normalize_game_ids(games: pd.DataFrame, box: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
-    games["GAME_ID"] = games["GAME_ID"].astype(str)
-    box["GAME_ID"]   = box["GAME_ID"].astype(str)
-    games["GID_NORM"] = games["GAME_ID"].str.lstrip("0")
-    box["GID_NORM"]   = box["GAME_ID"].str.lstrip("0")
+    games["GAME_ID"] = _as_str_category(games["GAME_ID"])
+    box["GAME_ID"]   = _as_str_category(box["GAME_ID"])
+    # Integer ids make the game joins below plain np.isin calls
+    games["GID_NORM"] = _gid_to_int(games["GAME_ID"])
+    box["GID_NORM"]   = _gid_to_int(box["GAME_ID"])
     return games, box
 
 def filter_regular_season_and_playoffs(games: pd.DataFrame) -> pd.DataFrame:
     # Prefer explicit SEASON_TYPE if present
     if "SEASON_TYPE" in games.columns:
         mask = games["SEASON_TYPE"].isin(["Regular Season", "Playoffs"])
-        return games.loc[mask].copy()
+        return games.loc[mask]
     # Fallback by GAME_ID prefix (use normalized)
-    mask = games["GID_NORM"].str.startswith(("2", "4"))  # 2=RS, 4=PO
-    return games.loc[mask].copy()
+    mask = games["GID_NORM"].astype(str).str.startswith(("2", "4"))  # 2=RS, 4=PO
+    return games.loc[mask]
 
 def ensure_start_position(box: pd.DataFrame) -> pd.DataFrame:
     if "START_POSITION" not in box.columns:
         box["START_POSITION"] = ""
-    box["START_POSITION"] = box["START_POSITION"].fillna("").astype(str)
+    pos = _as_str_category(box["START_POSITION"])
+    if "" not in pos.cat.categories:
+        pos = pos.cat.add_categories("")
+    box["START_POSITION"] = pos.fillna("")
     return box
 
 def build_box_gsw(box: pd.DataFrame, games: pd.DataFrame, team_id: int) -> pd.DataFrame:
-    valid_gid_norm = set(games["GID_NORM"].unique())
-    box_gsw = box[
-        (box["TEAM_ID"] == team_id) &
-        (box["GID_NORM"].isin(valid_gid_norm))
-    ].copy()
+    is_team = (box["TEAM_ID"] == team_id).to_numpy(dtype=bool, na_value=False)
+    # Missing ids are dropped from the lookup side, so they never join
+    in_games = np.isin(_gid_values(box["GID_NORM"]), _gid_values(games["GID_NORM"].dropna().drop_duplicates()))
+    box_gsw = box[is_team & in_games]
     return box_gsw
 
-def detect_c_starters(box_gsw: pd.DataFrame) -> pd.DataFrame:
+def _is_center_position(positions: pd.Index) -> pd.Index:
     # Normalize START_POSITION and treat any slot that includes "C" as center
-    pos = box_gsw["START_POSITION"].astype(str).str.upper().str.strip()
-    is_center = pos.str.contains(r"\bC\b") | pos.str.startswith("C") | pos.str.endswith("C")
-    starters_c = box_gsw.loc[is_center, ["GID_NORM", "PLAYER_NAME"]].copy()
-    starters_c["PLAYER_NAME_NORM"] = starters_c["PLAYER_NAME"].astype(str).str.upper().str.strip()
+    pos = positions.str.upper().str.strip()
+    return pos.str.contains(r"\bC\b") | pos.str.startswith("C") | pos.str.endswith("C")
+
+def detect_c_starters(box_gsw: pd.DataFrame) -> pd.DataFrame:
+    # START_POSITION has a handful of distinct values ("C", "F", "G", ""), so the
+    # regex runs once per value and rows just gather from the lookup table
+    is_center = gather_by_category(box_gsw["START_POSITION"], _is_center_position, False, dtype=bool)
+    starters_c = box_gsw.loc[is_center, ["GID_NORM", "PLAYER_NAME"]]
+    starters_c["PLAYER_NAME_NORM"] = map_categories(starters_c["PLAYER_NAME"], norm_str)
     return starters_c
 
 def build_allowed_traditional_set(
@@ -76,24 +270,40 @@ def build_allowed_traditional_set(
     include_traditional: Set[str],
 ) -> Set[str]:
     detected = set(starters_c["PLAYER_NAME_NORM"].unique())
-    return (detected - {n.upper() for n in exclude_small_ball}) | {n.upper() for n in include_traditional}
+    exclude = set(norm_str(pd.Index(list(exclude_small_ball), dtype=str)))
+    include = set(norm_str(pd.Index(list(include_traditional), dtype=str)))
+    return (detected - exclude) | include
 
 def label_has_traditional_center(games: pd.DataFrame, starters_c: pd.DataFrame, allowed_trad: Set[str]) -> pd.Series:
-    # Create a set of game IDs where an allowed name started at C
-    allowed_games = set(
-        starters_c.loc[starters_c["PLAYER_NAME_NORM"].isin(allowed_trad), "GID_NORM"].unique()
-    )
-    return games["GID_NORM"].isin(allowed_games)
+    # Game IDs where an allowed name started at C.
+    # Allowed names are resolved to category codes once; both row tests are integer isins.
+    names = _as_str_category(starters_c["PLAYER_NAME_NORM"])
+    allowed_codes = names.cat.categories.get_indexer(list(allowed_trad))
+    is_allowed = np.isin(names.cat.codes.to_numpy(), allowed_codes[allowed_codes >= 0])
+    allowed_ids = _gid_values(starters_c.loc[is_allowed, "GID_NORM"].dropna())
+    return pd.Series(np.isin(_gid_values(games["GID_NORM"]), allowed_ids), index=games.index)
+
+def _nanmean(values: np.ndarray) -> float:
+    values = values[~np.isnan(values)]
+    return values.mean() if len(values) else np.nan
 
 def summarize_games(games: pd.DataFrame) -> pd.DataFrame:
-    summary = (
-        games.groupby("HAS_CENTER").agg(
-            games_played=("GAME_DATE", "count"),
-            wins=("WL", lambda x: (x == "W").sum()),
-            avg_pts_scored=("PTS", "mean"),
-            avg_pts_allowed=("PTS_OPP", "mean"),
-        ).reset_index()
-    )
+    # HAS_CENTER only has two values, so split with boolean masks instead of groupby
+    mask = games["HAS_CENTER"].to_numpy(dtype=bool)
+    has_date = games["GAME_DATE"].notna().to_numpy()
+    wl_win = (games["WL"] == "W").to_numpy(dtype=bool, na_value=False)
+    pts = games["PTS"].to_numpy(dtype="float64", na_value=np.nan)
+    pts_opp = games["PTS_OPP"].to_numpy(dtype="float64", na_value=np.nan)
+
+    # Same rows/order groupby would give: False then True, empty groups dropped
+    splits = [(flag, m) for flag, m in ((False, ~mask), (True, mask)) if m.any()]
+    summary = pd.DataFrame({
+        "HAS_CENTER": np.array([flag for flag, _ in splits], dtype=bool),
+        "games_played": np.array([has_date[m].sum() for _, m in splits], dtype="int64"),
+        "wins": np.array([wl_win[m].sum() for _, m in splits], dtype="int64"),
+        "avg_pts_scored": np.array([_nanmean(pts[m]) for _, m in splits], dtype="float64"),
+        "avg_pts_allowed": np.array([_nanmean(pts_opp[m]) for _, m in splits], dtype="float64"),
+    })
     summary["win_rate"]  = (summary["wins"] / summary["games_played"]) * 100
     summary["net_rating"] = summary["avg_pts_scored"] - summary["avg_pts_allowed"]
     summary["label"] = summary["HAS_CENTER"].map({True: "With Traditional Center", False: "Without Traditional Center"})
@@ -102,8 +312,8 @@ def summarize_games(games: pd.DataFrame) -> pd.DataFrame:
 def team_eff(df: pd.DataFrame) -> Dict[str, Any]:
     if df.empty:
         return {"avg_pts_scored": None, "avg_pts_allowed": None, "net_rating": None}
-    avg_pts = df["PTS"].mean()
-    avg_opp = df["PTS_OPP"].mean()
+    # Both columns in one pass over a (rows, 2) array
+    avg_pts, avg_opp = np.nanmean(df[["PTS", "PTS_OPP"]].to_numpy(dtype="float64", na_value=np.nan), axis=0)
     return {
         "avg_pts_scored": int(round(avg_pts)),
         "avg_pts_allowed": int(round(avg_opp)),
@@ -116,8 +326,9 @@ def win_rate(df: pd.DataFrame) -> float:
     return (df["WL"] == "W").mean()
 
 def fmt_pct(p: float) -> str:
-    import pandas as _pd  # ✅ correct local alias to avoid linter noise
-    return f"{int(round(p * 100))}%" if _pd.notna(p) else "N/A"
+    if p is None or p is pd.NA or (isinstance(p, float) and math.isnan(p)):
+        return "N/A"
+    return f"{int(round(p * 100))}%"
 
 def pipeline(
     games: pd.DataFrame,
@@ -134,6 +345,11 @@ def pipeline(
     exclude_small_ball_final: Set[str] = (exclude_small_ball or EXCLUDE_SMALL_BALL_DEFAULT)
     include_traditional_final: Set[str] = (include_traditional or INCLUDE_TRADITIONAL_DEFAULT)
 
+    # Work on category codes rather than Python strings for the repeated string columns
+    for col in ("PLAYER_NAME", "TEAM_ABBREVIATION", "START_POSITION"):
+        if col in box.columns:
+            box[col] = _as_str_category(box[col])
+
     # Normalize, filter, build
     games, box = normalize_game_ids(games, box)
     games = add_pts_opp_if_missing(games)
@@ -146,7 +362,71 @@ def pipeline(
     allowed_trad = build_allowed_traditional_set(starters_c, exclude_small_ball_final, include_traditional_final)
 
     # Label
-    games = games.copy()
     games["HAS_CENTER"] = label_has_traditional_center(games, starters_c, allowed_trad)
 
-    return games, box_gsw, starters_c, allowed_trad
\ No newline at end of file
+    return games, box_gsw, starters_c, allowed_trad
+
+def _pipeline_cache_key(paths: List[Path], params: Dict[str, Any]) -> str:
+    # Inputs, this module (so logic changes invalidate old entries) and the pipeline options
+    parts = []
+    for p in [*paths, Path(__file__)]:
+        st = p.stat()
+        parts.append(f"{p.resolve()}:{st.st_mtime_ns}:{st.st_size}")
+    parts.append(json.dumps(params, sort_keys=True))
+    return hashlib.md5("|".join(parts).encode()).hexdigest()
+
+def pipeline_cached(
+    games_path,
+    box_path,
+    team_id: Optional[int] = None,
+    exclude_small_ball: Optional[Set[str]] = None,
+    include_traditional: Optional[Set[str]] = None,
+    cache_dir=PIPELINE_CACHE_DIR_DEFAULT,
+) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, Set[str]]:
+    """Load the two CSVs and run pipeline(), memoized to Parquet under `cache_dir`.
+
+    Entries are keyed by the inputs' path/mtime/size plus the pipeline options, so an
+    unchanged run only reads back the cached frames. Only the latest entry is kept. A miss
+    also returns the frames read back from the new entry, so every run gets the same dtypes.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Keep Arrow-backed text columns Arrow-backed (plain read_parquet turns them into StringDtype)
+    arrow_str = {pa.string(): pd.ArrowDtype(pa.string()), pa.large_string(): pd.ArrowDtype(pa.string())}.get
+
+    params = {
+        "TEAM_ID": os.getenv("TEAM_ID"),
+        "team_id": team_id,
+        "exclude_small_ball": sorted(exclude_small_ball or []),
+        "include_traditional": sorted(include_traditional or []),
+    }
+    entry = Path(cache_dir) / _pipeline_cache_key([Path(games_path), Path(box_path)], params)
+    marker = entry / "allowed_trad.json"  # written last, so its presence means a complete entry
+
+    def load_entry():
+        frames = [
+            pq.read_table(entry / f"{name}.parquet").to_pandas(types_mapper=arrow_str)
+            for name in ("games", "box_gsw", "starters_c")
+        ]
+        return (*frames, set(json.loads(marker.read_text())))
+
+    if marker.exists():
+        return load_entry()
+
+    games = read_csv(games_path, parse_dates=["GAME_DATE"])
+    box = read_csv(box_path, dtype={"GAME_ID": str})
+    games, box_gsw, starters_c, allowed_trad = pipeline(
+        games, box, team_id, exclude_small_ball, include_traditional
+    )
+
+    entry.mkdir(parents=True, exist_ok=True)
+    games.to_parquet(entry / "games.parquet")
+    box_gsw.to_parquet(entry / "box_gsw.parquet")
+    starters_c.to_parquet(entry / "starters_c.parquet")
+    marker.write_text(json.dumps(sorted(allowed_trad)))
+    # Older entries are for stale inputs/code/options; drop them so the cache doesn't grow
+    for other in Path(cache_dir).iterdir():
+        if other.is_dir() and other != entry:
+            shutil.rmtree(other, ignore_errors=True)
+    return load_entry()
\ No newline at end of file
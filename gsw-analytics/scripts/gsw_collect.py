@@ -1,7 +1,8 @@
 from dotenv import load_dotenv
 load_dotenv()
 
-import os, time
+import os, time, random, shutil
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List
 import pandas as pd
 from nba_api.stats.static import teams
@@ -9,12 +10,27 @@ from nba_api.stats.endpoints import leaguegamefinder, boxscoretraditionalv2
 from requests_cache import install_cache
 
 # ---- Caching: patch requests globally so nba_api uses it ----
-# Cache for 24h; change to 3600 (1h) if you prefer
-install_cache("nba_cache", expire_after=86400)
+# Cache for 24h; change to 3600 (1h) if you prefer.
+# NBA_CACHE_BACKEND=filesystem stores one file per response (no SQLite locking between
+# the fetch threads); the default SQLite cache skips per-write fsync and uses WAL.
+NBA_CACHE_BACKEND = os.getenv("NBA_CACHE_BACKEND", "sqlite")
+_backend_opts = {"fast_save": True, "wal": True} if NBA_CACHE_BACKEND == "sqlite" else {}
+install_cache(
+    "nba_cache",
+    backend=NBA_CACHE_BACKEND,
+    expire_after=86400,
+    allowable_methods=("GET",),
+    stale_if_error=True,
+    **_backend_opts,
+)
 
 # ---- Config ----
 SEASON = os.getenv("SEASON", "2024-25")
 TEAM_ABBR = os.getenv("TEAM_ABBR", "GSW")
+# Boxscore fetches are network-bound; keep this modest to stay under the NBA rate limit
+NBA_CONCURRENCY = int(os.getenv("NBA_CONCURRENCY", "6"))
+# Finished boxscores land here one file per game, so an interrupted run can resume
+PARTS_DIR = os.path.join("data", ".boxscore_parts")
 
 def get_team_id(team_abbr: str) -> int:
     all_teams = teams.get_teams()
@@ -39,14 +55,12 @@ def get_games_for_team(team_id: int, season: str) -> pd.DataFrame:
 
 def fetch_boxscore_safe(game_id: str, retries: int = 5, base_sleep: float = 1.2) -> pd.DataFrame:
     """
-    Robust boxscore fetch: longer timeout, retry with backoff, polite delay.
+    Robust boxscore fetch: longer timeout, retry with jittered backoff.
     Returns a DataFrame (may be empty if the endpoint returns none).
     """
     last_err = None
     for attempt in range(1, retries + 1):
         try:
-            # Slight delay to avoid rate limits
-            time.sleep(base_sleep)
             bs = boxscoretraditionalv2.BoxScoreTraditionalV2(game_id=game_id, timeout=90)
             frames = bs.get_data_frames()
             if not frames:
@@ -56,20 +70,50 @@ def fetch_boxscore_safe(game_id: str, retries: int = 5, base_sleep: float = 1.2)
             return part
         except Exception as e:
             last_err = e
-            # Exponential backoff
-            time.sleep(base_sleep * attempt * 1.5)
+            # Backoff with jitter so concurrent workers don't retry in lockstep
+            time.sleep(base_sleep * attempt * 1.5 + random.uniform(0, base_sleep))
     # If still failing after retries, raise so we can see which GAME_ID caused it
     raise RuntimeError(f"Failed to fetch boxscore for GAME_ID={game_id}") from last_err
 
-def get_boxscores(game_ids: list[str]) -> pd.DataFrame:
-    parts = []
-    for i, gid in enumerate(game_ids, 1):
-        df_part = fetch_boxscore_safe(gid)
-        if df_part is not None and not df_part.empty:
-            parts.append(df_part)
-        # Progress in console
-        if i % 10 == 0:
-            print(f"Fetched {i}/{len(game_ids)} boxscores…")
+def _part_path(game_id: str, parts_dir: str) -> str:
+    return os.path.join(parts_dir, f"{game_id}.csv")
+
+def fetch_boxscore_to_part(game_id: str, parts_dir: str) -> None:
+    """Fetch one boxscore and write it to its part file (nothing is written if empty)."""
+    df_part = fetch_boxscore_safe(game_id)
+    if df_part is not None and not df_part.empty:
+        # Write under a temp name and rename into place, so a killed run never leaves a
+        # truncated part that the resume check would take as complete
+        path = _part_path(game_id, parts_dir)
+        df_part.to_csv(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+
+def get_boxscores(game_ids: list[str], parts_dir: str = PARTS_DIR, max_workers: int = NBA_CONCURRENCY) -> pd.DataFrame:
+    os.makedirs(parts_dir, exist_ok=True)
+
+    # Parts left behind by an interrupted run are reused as-is
+    todo = [gid for gid in game_ids if not os.path.exists(_part_path(gid, parts_dir))]
+    if len(todo) < len(game_ids):
+        print(f"Reusing {len(game_ids) - len(todo)} boxscores from {parts_dir}")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_boxscore_to_part, gid, parts_dir): gid for gid in todo}
+        for i, fut in enumerate(as_completed(futures), 1):
+            try:
+                fut.result()  # re-raise so we can see which GAME_ID failed
+            except Exception:
+                # Drop the queued fetches instead of running them (and their retries) first
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            # Progress in console
+            if i % 10 == 0:
+                print(f"Fetched {i}/{len(todo)} boxscores…")
+
+    parts = [
+        pd.read_csv(_part_path(gid, parts_dir), dtype={"GAME_ID": str})
+        for gid in game_ids
+        if os.path.exists(_part_path(gid, parts_dir))
+    ]
     return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
 
 def main():
@@ -86,7 +130,7 @@ def main():
 
     already = set()
     if os.path.exists(out_path):
-        old = pd.read_csv(out_path, dtype={"GAME_ID": str})
+        old = pd.read_csv(out_path, usecols=["GAME_ID"], dtype={"GAME_ID": str})
         if not old.empty:
             already = set(old["GAME_ID"].unique())
             print(f"Resuming: found {len(already)} boxscores already on disk")
@@ -96,13 +140,19 @@ def main():
 
     if remaining:
         new_box = get_boxscores(remaining)
-        if os.path.exists(out_path) and len(already) > 0:
-            # Append and deduplicate
-            merged = pd.concat([pd.read_csv(out_path, dtype={"GAME_ID": str}), new_box], ignore_index=True)
-            merged = merged.drop_duplicates(subset=["GAME_ID", "PLAYER_ID"], keep="last")
-            merged.to_csv(out_path, index=False)
+        if os.path.exists(out_path) and already:
+            # Only games not on disk were fetched, so append instead of re-reading + deduplicating
+            if not new_box.empty:
+                new_box = new_box[~new_box["GAME_ID"].isin(already)]
+                header = pd.read_csv(out_path, nrows=0).columns  # keep the file's column order
+                dropped = sorted(set(new_box.columns) - set(header))
+                if dropped:
+                    print(f"Warning: {out_path} has no column for {dropped}; those values are not appended")
+                new_box.reindex(columns=header).to_csv(out_path, mode="a", header=False, index=False)
         else:
             new_box.to_csv(out_path, index=False)
+        # Everything is in out_path now; the per-game parts are no longer needed
+        shutil.rmtree(PARTS_DIR, ignore_errors=True)
 
     box = pd.read_csv(out_path, dtype={"GAME_ID": str})
     print(f"Saved {len(box)} boxscore rows to {out_path}")
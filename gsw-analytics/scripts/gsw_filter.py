@@ -1,11 +1,14 @@
-import pandas as pd
+from scripts.common_center_utils import read_csv, gather_by_category
 
-games = pd.read_csv("data/gsw_games.csv", parse_dates=["GAME_DATE"])
-box = pd.read_csv("data/gsw_boxscores.csv")
+games = read_csv("data/gsw_games.csv", parse_dates=["GAME_DATE"])
+box = read_csv("data/gsw_boxscores.csv")
 
 # 1) Home vs Away Performance
-home = games[games["MATCHUP"].str.contains(" vs. ")]
-away = games[games["MATCHUP"].str.contains(" @ ")]
+# Few distinct matchups: test the categories (plain substring, no regex) and gather via the codes
+is_home = gather_by_category(games["MATCHUP"], lambda c: c.str.contains(" vs. ", regex=False), False, dtype=bool)
+is_away = gather_by_category(games["MATCHUP"], lambda c: c.str.contains(" @ ", regex=False), False, dtype=bool)
+home = games[is_home]
+away = games[is_away]
 
 print("Home Games:", len(home), "Away Games:", len(away))
 
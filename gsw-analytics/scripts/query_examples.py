@@ -24,10 +24,11 @@ print(pd.read_sql(q2, con))
 
 # Example 3: Average minutes for bench (no START_POSITION) vs starters
 q3 = """
-SELECT CASE WHEN START_POSITION IS NULL THEN 'Bench' ELSE 'Starter' END AS role,
+SELECT CASE IS_BENCH WHEN 1 THEN 'Bench' ELSE 'Starter' END AS role,
        ROUND(AVG(MIN_float),2) AS avg_min
 FROM boxscores
-GROUP BY role;
+GROUP BY IS_BENCH
+ORDER BY IS_BENCH DESC;
 """
 print(pd.read_sql(q3, con))
 
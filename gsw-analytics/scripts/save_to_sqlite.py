@@ -1,36 +1,48 @@
 import os
 import sqlite3
-import pandas as pd
+from scripts.common_center_utils import read_csv, mmss_to_min
 
 os.makedirs("data", exist_ok=True)
 
 # Load your CSVs
-games = pd.read_csv("data/gsw_games.csv", parse_dates=["GAME_DATE"])
-box = pd.read_csv("data/gsw_boxscores.csv", dtype={"GAME_ID": str})
+games = read_csv("data/gsw_games.csv", parse_dates=["GAME_DATE"])
+box = read_csv("data/gsw_boxscores.csv", dtype={"GAME_ID": str})
 
 # Optional: Clean minutes to numeric for easier queries later
-def mmss_to_min(s):
-    try:
-        m, s = str(s).split(":")
-        return int(m) + int(s) / 60
-    except Exception:
-        return 0.0
-    
-box["MIN_float"] = box["MIN"].apply(mmss_to_min)
+box["MIN_float"] = mmss_to_min(box["MIN"])
+# Bench = no START_POSITION; stored as a 0/1 column so queries can group on an index
+box["IS_BENCH"] = box["START_POSITION"].isna().astype("int8")
 
 #Create / open SQLite database
 
 con = sqlite3.connect("data/gsw.db")
+# Write-once analytical DB: rollback journal in RAM (unlike WAL, not persisted in the file),
+# skip fsync on every commit and keep temp B-trees in memory
+con.executescript("PRAGMA journal_mode=MEMORY; PRAGMA synchronous=OFF; PRAGMA temp_store=MEMORY;")
 
-#Write Tables
-games.to_sql("games", con, if_exists="replace", index=False)
-box.to_sql("boxscores", con, if_exists="replace", index=False)
+#Write Tables (pandas' default method batches each chunk through executemany;
+#method="multi" would exceed SQLite's bound-parameter limit at this chunk size)
+with con:
+    games.to_sql("games", con, if_exists="replace", index=False, chunksize=10_000)
+    box.to_sql("boxscores", con, if_exists="replace", index=False, chunksize=10_000)
 
-#QOL simple index for faster queries
+#QOL simple index for faster queries (built after the inserts, not maintained per row)
 with con:
     con.execute("CREATE INDEX IF NOT EXISTS idx_box_game ON boxscores (GAME_ID);")
-    con.execute("CREATE INDEX IF NOT EXISTS idx_box_player ON boxscores (PLAYER_NAME);")
+    # Composite indexes for query_examples: q2 (player + FG3M range), q1 (per-player PTS sums);
+    # each also serves plain PLAYER_NAME lookups, so no separate single-column index
+    con.execute("CREATE INDEX IF NOT EXISTS idx_box_player_fg3m ON boxscores (PLAYER_NAME, FG3M);")
+    con.execute("CREATE INDEX IF NOT EXISTS idx_box_player_pts ON boxscores (PLAYER_NAME, PTS);")
+    # q3: covering index, so bench/starter minutes aggregate straight off the index
+    con.execute("CREATE INDEX IF NOT EXISTS idx_box_is_bench ON boxscores (IS_BENCH, MIN_float);")
+    # Give the planner fresh statistics so it picks the new indexes
+    con.execute("ANALYZE boxscores;")
     
 con.close()
 
-print("Wrote data/g 'gsw.db' with tables: games, boxscores")
\ No newline at end of file
+# Same tables as Arrow IPC files for consumers that only want a DataFrame (no SQL, no CSV parse)
+games.to_feather("data/games.feather")
+box.to_feather("data/boxscores.feather")
+
+print("Wrote data/g 'gsw.db' with tables: games, boxscores")
+print("Wrote data/games.feather and data/boxscores.feather")
\ No newline at end of file
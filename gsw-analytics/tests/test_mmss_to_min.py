@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from scripts.common_center_utils import _mmss_to_min_kernel, _mmss_to_min_pandas, mmss_to_min
+
+# Inputs both paths must agree on: the "MM:SS" the API sends, missing values and junk,
+# including non-ASCII text (the kernel must not choke on it)
+CASES = [
+    "33:27", "0:00", "12:30", "34:12", "12", "12:", ":30", "", "abc", "DNP", "nan", "12:30:15",
+    "—", "DNP – Coach", "12:30\xa0", "é:30", "１２:30", "12:３０", None,
+]
+
+def test_kernel_and_pandas_paths_agree():
+    minutes = pd.Series(CASES, dtype=object)
+    kernel = _mmss_to_min_kernel(minutes)
+    fallback = _mmss_to_min_pandas(minutes)
+    for text, k, f in zip(CASES, kernel, fallback):
+        assert k == f, (text, k, f)
+
+def test_mmss_to_min_values():
+    got = mmss_to_min(pd.Series(["12:30", "34:12", None, "DNP", "DNP – Coach"]))
+    np.testing.assert_array_equal(got, [12.5, 34.2, 0.0, 0.0, 0.0])
+    assert got.dtype == np.float64
@@ -0,0 +1,16 @@
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.common_center_utils import pipeline_cached
+
+DATA = Path(__file__).resolve().parents[1] / "data"
+
+def test_cache_hit_matches_miss(tmp_path):
+    args = (DATA / "gsw_games.csv", DATA / "gsw_boxscores.csv")
+    miss = pipeline_cached(*args, cache_dir=tmp_path)
+    hit = pipeline_cached(*args, cache_dir=tmp_path)
+    assert len(list(tmp_path.iterdir())) == 1
+    for m, h in zip(miss[:3], hit[:3]):
+        pd.testing.assert_frame_equal(m, h)
+    assert miss[3] == hit[3]